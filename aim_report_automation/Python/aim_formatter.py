@@ -1,72 +1,119 @@
 import pandas as pd
 import numpy as np
-from openpyxl import load_workbook
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.worksheet.datavalidation import DataValidation
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.indexed_list import IndexedList
+from copy import copy
 from datetime import datetime
 from tkinter import Tk, filedialog
 import re, os, subprocess, platform
 
+# ------------------------------------------------------------
+# Shared styles (openpyxl stores styles by reference, so reuse them)
+# ------------------------------------------------------------
+CENTER = Alignment(horizontal="center", vertical="center")
+WRAP = Alignment(wrap_text=True, vertical="top")
+BOLD = Font(bold=True)
+THIN_BORDER = Border(left=Side(style='thin'), right=Side(style='thin'),
+                     top=Side(style='thin'), bottom=Side(style='thin'))
+
+
+def styled_cell(ws, value, **styles):
+    # write-only sheets can't be styled after the fact, so style each cell as it's built
+    cell = WriteOnlyCell(ws, value=value)
+    for name, style in styles.items():
+        setattr(cell, name, style)
+    return cell
+
+
+# Inspection statuses offered in the dropdown and counted on the dashboard
+STATUSES = ["Pending", "Complete", "Incomplete", "Needs Review"]
+
 # ------------------------------------------------------------
 # Floor / Room Extraction
 # ------------------------------------------------------------
-def extract_floor_room(description: str):
-    if not description or not isinstance(description, str):
-        return "", ""
-    desc = description.strip()
-    floor_val, room_val = "", ""
-
-    floor_match = re.search(r"(?:Floor:|Flr:)\s*([A-Za-z0-9]+)", desc, re.IGNORECASE)
-    if floor_match:
-        floor_val = floor_match.group(1).strip()
-
-    room_match = re.search(r"(?:Room:|Rm:)\s*([A-Za-z0-9]+)", desc, re.IGNORECASE)
-    if room_match:
-        room_val = room_match.group(1).strip()
-
-    # fallback from room number
-    if not floor_val and room_val:
-        if len(room_val) >= 4 and room_val[:2].isdigit() and room_val[:2] in ("10", "11", "12"):
-            floor_val = room_val[:2]
-        else:
-            mapping = {"0": "B", "1": "1", "2": "2", "3": "3", "4": "4",
-                       "5": "5", "6": "6", "7": "7", "8": "8", "9": "9"}
-            floor_val = mapping.get(room_val[0], "")
-    if floor_val.upper() == "SF":
-        floor_val = "SF"
-    elif floor_val in ("0", "B"):
-        floor_val = "B"
+FLOOR_RE = re.compile(r"(?:Floor:|Flr:)\s*(?P<floor>[A-Za-z0-9]+)", re.IGNORECASE)
+ROOM_RE = re.compile(r"(?:Room:|Rm:)\s*(?P<room>[A-Za-z0-9]+)", re.IGNORECASE)
+ROOM_NUM_RE = re.compile(r"^(\d+)")
+ROOM_SPECIAL_RE = re.compile(r"HALL|STR|ELEV")
+HEADER_JUNK_RE = re.compile(r"[^\x20-\x7E]")
+# digit runs at or past this don't fit int64; they rank as unknown instead of wrapping
+RANK_LIMIT = 2.0 ** 63
+ROOM_LEAD_FLOOR = {"0": "B", "1": "1", "2": "2", "3": "3", "4": "4",
+                   "5": "5", "6": "6", "7": "7", "8": "8", "9": "9"}
+
+
+def floor_from_room(room_val: pd.Series):
+    # 10xx/11xx/12xx -> 10/11/12, otherwise the leading digit (0 -> B)
+    lead2 = room_val.str[:2]
+    floor_val = room_val.str[0].map(ROOM_LEAD_FLOOR).fillna("")
+    return floor_val.mask((room_val.str.len() >= 4) & lead2.isin(("10", "11", "12")), lead2)
+
+
+def extract_floor_room(descriptions: pd.Series):
+    desc = descriptions.astype("string")
+    floor_val = desc.str.extract(FLOOR_RE, expand=False).fillna("").astype(object)
+    room_val = desc.str.extract(ROOM_RE, expand=False).fillna("").astype(object)
+
+    # fallback from room number, only where no floor was given
+    missing = floor_val.eq("") & room_val.ne("")
+    floor_val[missing] = floor_from_room(room_val[missing])
+
+    floor_val = floor_val.mask(floor_val.str.upper().eq("SF"), "SF")
+    floor_val = floor_val.mask(floor_val.isin(("0", "B")), "B")
     return floor_val, room_val
 
 
-def floor_rank(floor_val):
-    if not floor_val or str(floor_val).strip() == "":
-        return 999
-    v = str(floor_val).upper().strip()
-    if v == "B":
-        return 0
-    if v == "SF":
-        return 99
-    return int(v) if v.isdigit() else 999
+def floor_rank(floors: pd.Series):
+    v = floors.fillna("").astype(str).str.upper().str.strip()
+    rank = pd.to_numeric(v.where(v.str.isdigit()), errors="coerce")
+    rank = rank.where(rank < RANK_LIMIT)
+    rank = rank.mask(v.eq("B"), 0).mask(v.eq("SF"), 99)
+    return rank.fillna(999).astype(int)
 
 
-def room_rank(room_val):
-    if not room_val or str(room_val).strip() == "":
-        return 999999
-    val = room_val.upper().strip()
-    if any(x in val for x in ("HALL", "STR", "ELEV")):
-        return 700000
-    match = re.match(r"(\d+)", val)
-    return int(match.group(1)) if match else 600000
+def room_rank(rooms: pd.Series):
+    val = rooms.fillna("").astype(str).str.upper().str.strip()
+    rank = pd.to_numeric(val.str.extract(ROOM_NUM_RE, expand=False), errors="coerce")
+    rank = rank.where(rank < RANK_LIMIT).fillna(600000)
+    rank = rank.mask(val.str.contains(ROOM_SPECIAL_RE), 700000)
+    rank = rank.mask(val.eq(""), 999999)
+    return rank.astype(int)
 
 
-def calculate_business_days(start_date, end_date):
-    if pd.isna(start_date):
-        return None
+def calculate_business_days(start_days, end_day):
+    # start_days: datetime64[D] array (NaT where missing), end_day: datetime64[D]
+    ages = np.full(start_days.shape, np.nan)
+    valid = ~np.isnat(start_days)
+    ages[valid] = np.busday_count(start_days[valid], end_day)
+    return ages
+
+
+def optimize_dtypes(df):
+    # derived columns only: small ints and low-cardinality labels
+    df["Age (Days)"] = pd.to_numeric(df["Age (Days)"], downcast="integer")
+    for col in ("Floor", "Inspection Status"):
+        df[col] = df[col].astype("category")
+    return df
+
+
+# ------------------------------------------------------------
+# CSV loading
+# ------------------------------------------------------------
+def read_report(csv_path):
     try:
-        return np.busday_count(start_date.date(), end_date.date()) or 0
-    except Exception:
-        return None
+        return pd.read_csv(csv_path, engine="pyarrow", dtype_backend="pyarrow")
+    except (ImportError, pd.errors.ParserError):
+        # pyarrow not installed, or it rejected short/ragged rows that the
+        # default C parser accepts (padding them with blanks)
+        return pd.read_csv(csv_path)
+
+
+def clean_headers(columns):
+    return [HEADER_JUNK_RE.sub("", str(c)).strip() for c in columns]
 
 
 # ------------------------------------------------------------
@@ -76,11 +123,11 @@ def run_aim_formatter(csv_path, output_path=None):
     print(f"\n=== Running AIM Formatter ===")
     print(f"Input CSV: {csv_path}\n")
 
-    df = pd.read_csv(csv_path)
+    df = read_report(csv_path)
     today = datetime.now()
 
     # clean headers
-    df.columns = [re.sub(r"[^\x20-\x7E]", "", c).strip().replace("\ufeff", "") for c in df.columns]
+    df.columns = clean_headers(df.columns.tolist())
     print("Detected headers:", list(df.columns))
 
     def find_col(part):
@@ -99,83 +146,90 @@ def run_aim_formatter(csv_path, output_path=None):
                        date_col: "Date Created"}, inplace=True)
 
     # derived columns
-    df["Age (Days)"] = df["Date Created"].apply(lambda d: calculate_business_days(pd.to_datetime(d), today))
-    df["Floor"], df["Room"] = zip(*df["Description"].apply(extract_floor_room))
-    df["__FloorRank"] = df["Floor"].apply(floor_rank)
-    df["__RoomRank"] = df["Room"].apply(room_rank)
+    # format="mixed": parse each value on its own, as the old per-row apply did
+    dates = pd.to_datetime(df["Date Created"], errors="coerce", format="mixed")
+    df["Age (Days)"] = calculate_business_days(dates.values.astype("datetime64[D]"),
+                                               np.datetime64(today.date(), "D"))
+    # real dates, so Excel can sort/filter them; keep the exported text if it didn't parse
+    df["Date Created"] = dates.dt.date.where(dates.notna(), df["Date Created"]).astype(object)
+    df["Floor"], df["Room"] = extract_floor_room(df["Description"])
     df["Inspection Status"] = "Pending"
-    df.sort_values(by=["__FloorRank", "__RoomRank"], inplace=True)
 
-    # load template
+    # sort by floor, then room (lexsort takes the primary key last)
+    order = np.lexsort((room_rank(df["Room"]).to_numpy(), floor_rank(df["Floor"]).to_numpy()))
+    df = optimize_dtypes(df).iloc[order].reset_index(drop=True)
+
+    # new write-only workbook carrying the template's VBA project
     template_path = os.path.expanduser("~/Desktop/excelProgram/Python/template.xlsm")
     if not os.path.exists(template_path):
         raise FileNotFoundError(f"Template not found: {template_path}")
 
-    wb = load_workbook(template_path, keep_vba=True)
-    ws = wb["Work Orders"]
-    ws.delete_rows(1, ws.max_row)
+    template = load_workbook(template_path, keep_vba=True)
+    wb = Workbook(write_only=True)
+    wb.vba_archive = template.vba_archive
+    wb.code_name = template.code_name
+    # keep the template's look: theme, named styles and default font (Aptos Narrow 18).
+    # The named styles index into the template's style lists, so take all of them
+    wb.loaded_theme = template.loaded_theme
+    for attr in ("_fonts", "_fills", "_borders", "_number_formats", "_protections", "_alignments"):
+        setattr(wb, attr, IndexedList(getattr(template, attr)))
+    wb._named_styles = template._named_styles
+    wb._table_styles = template._table_styles
+    template_ws = template["Work Orders"]
+    ws = wb.create_sheet("Work Orders")
+    # keep the sheet bound to its VBA document module, with the template's row height and margins
+    ws.sheet_properties.codeName = template_ws.sheet_properties.codeName
+    ws.sheet_format = copy(template_ws.sheet_format)
+    ws.page_margins = copy(template_ws.page_margins)
 
     headers = list(df.columns)
-    ws.append(headers)
-
-    # header style
-    header_fill = PatternFill(start_color="BDD7EE", end_color="BDD7EE", fill_type="solid")
-    border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                    top=Side(style='thin'), bottom=Side(style='thin'))
-    for i, h in enumerate(headers, 1):
-        c = ws.cell(row=1, column=i)
-        c.value = h
-        c.fill = header_fill
-        c.font = Font(bold=True)
-        c.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        c.border = border
-
-    # write data
-    print(f"Writing {len(df)} rows to Excel...")
-    for _, row in df.iterrows():
-        ws.append(list(row.values))
+    last_row = len(df) + 1
 
-    # remove helper cols
-    room_idx = headers.index("__RoomRank") + 1
-    floor_idx = headers.index("__FloorRank") + 1
-    ws.delete_cols(room_idx)
-    ws.delete_cols(floor_idx)
-
-    # formatting
+    # formatting (write-only sheets need layout set before the first row)
     ws.freeze_panes = "A2"
-    for col in ws.columns:
-        header = ws.cell(row=1, column=col[0].column)
-        name = str(header.value)
+    letters = [get_column_letter(i) for i in range(1, len(headers) + 1)]
+    for letter, name in zip(letters, headers):
         if "Description" in name:
-            ws.column_dimensions[col[0].column_letter].width = 45
+            ws.column_dimensions[letter].width = 45
         elif "Inspection Status" in name:
-            ws.column_dimensions[col[0].column_letter].width = 20
+            ws.column_dimensions[letter].width = 20
         else:
-            ws.column_dimensions[col[0].column_letter].width = 14
+            ws.column_dimensions[letter].width = 14
+    ws.column_dimensions[letters[headers.index("Date Created")]].number_format = "yyyy-mm-dd"
 
     # dropdown
-    insp_col = headers.index("Inspection Status") + 1
+    insp_letter = letters[headers.index("Inspection Status")]
     dv = DataValidation(type="list",
-                        formula1='"Pending,Complete,Incomplete,Needs Review"',
+                        formula1=f'"{",".join(STATUSES)}"',
                         allow_blank=True)
     dv.error = "Please choose a valid status."
     dv.prompt = "Select an inspection status."
-    ws.add_data_validation(dv)
-    dv_range = f"{ws.cell(row=2, column=insp_col).coordinate}:{ws.cell(row=ws.max_row, column=insp_col).coordinate}"
-    dv.add(dv_range)
-
-    # borders & align
-    for row in ws.iter_rows(min_row=2, max_row=ws.max_row, max_col=ws.max_column):
-        for cell in row:
-            header_val = ws.cell(row=1, column=cell.column).value
-            if header_val and "Description" in str(header_val):
-                cell.alignment = Alignment(wrap_text=True, vertical="top")
-            else:
-                cell.alignment = Alignment(horizontal="center", vertical="center")
-            cell.border = border
+    ws.data_validations.append(dv)
+    status_range = f"{insp_letter}2:{insp_letter}{last_row}"
+    dv.add(status_range)
+
+    # header row
+    header_fill = PatternFill(start_color="BDD7EE", end_color="BDD7EE", fill_type="solid")
+    header_align = Alignment(horizontal="center", vertical="center", wrap_text=True)
+    ws.append([styled_cell(ws, h, fill=header_fill, font=BOLD, alignment=header_align, border=THIN_BORDER)
+               for h in headers])
+
+    # write data
+    print(f"Writing {len(df)} rows to Excel...")
+    # one styled cell per column, reused for every row: a write-only sheet
+    # serializes each row as soon as it's appended, so styles are set once
+    row_cells = [styled_cell(ws, None, alignment=WRAP if "Description" in h else CENTER, border=THIN_BORDER)
+                 for h in headers]
+    # blanks (NaN, NaT, Arrow's pd.NA) become None so openpyxl leaves them empty;
+    # convert column by column, as pandas can't interleave Arrow timestamps holding nulls
+    rows = zip(*(df[c].to_numpy(dtype=object, na_value=None) for c in df.columns))
+    for row in rows:
+        for cell, value in zip(row_cells, row):
+            cell.value = value
+        ws.append(row_cells)
 
     # dashboard
-    create_dashboard(ws, wb)
+    create_dashboard(df, wb)
 
     # save
     if not output_path:
@@ -195,47 +249,19 @@ def run_aim_formatter(csv_path, output_path=None):
 # ------------------------------------------------------------
 # Dashboard sheet
 # ------------------------------------------------------------
-def create_dashboard(ws_main, wb):
-    if "Dashboard" in wb.sheetnames:
-        del wb["Dashboard"]
+def create_dashboard(df, wb):
     ws_dash = wb.create_sheet("Dashboard")
+    for letter in ("A", "B"):
+        ws_dash.column_dimensions[letter].width = 25
+
+    counts = df["Inspection Status"].value_counts().reindex(STATUSES, fill_value=0).to_dict()
+    ages = df["Age (Days)"]
+    avg_age = round(float(ages.mean()), 2) if ages.notna().any() else 0
 
-    statuses = ["Pending", "Complete", "Incomplete", "Needs Review"]
-    counts = {s: 0 for s in statuses}
-    total_age = 0
-    age_count = 0
-
-    insp_col, age_col = None, None
-    for i, header in enumerate(ws_main[1], start=1):
-        if header.value == "Inspection Status":
-            insp_col = i
-        elif header.value == "Age (Days)":
-            age_col = i
-    if not insp_col or not age_col:
-        return
-
-    for row in ws_main.iter_rows(min_row=2, values_only=True):
-        status = row[insp_col - 1]
-        age = row[age_col - 1]
-        if status in counts:
-            counts[status] += 1
-        if isinstance(age, (int, float)):
-            total_age += age
-            age_count += 1
-
-    avg_age = round(total_age / age_count, 2) if age_count else 0
-    ws_dash.append(["Status", "Count"])
-    for s in statuses:
-        ws_dash.append([s, counts[s]])
-    ws_dash.append(["Average Age (Days)", avg_age])
-
-    for col in ws_dash.columns:
-        ws_dash.column_dimensions[col[0].column_letter].width = 25
-    for cell in ws_dash["A"] + ws_dash["B"]:
-        cell.border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                             top=Side(style='thin'), bottom=Side(style='thin'))
-    ws_dash["A1"].font = Font(bold=True)
-    ws_dash["B1"].font = Font(bold=True)
+    ws_dash.append([styled_cell(ws_dash, v, font=BOLD, border=THIN_BORDER) for v in ("Status", "Count")])
+    for s in STATUSES:
+        ws_dash.append([styled_cell(ws_dash, v, border=THIN_BORDER) for v in (s, counts[s])])
+    ws_dash.append([styled_cell(ws_dash, v, border=THIN_BORDER) for v in ("Average Age (Days)", avg_age)])
 
 
 # ------------------------------------------------------------